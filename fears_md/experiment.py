@@ -5,8 +5,75 @@ import pandas as pd
 import os
 import time
 import pickle
-import lifelines
 import copy
+import multiprocessing
+
+# allowed drug curve types
+_ALLOWED_CURVE_TYPES = frozenset({'linear',
+                                  'constant',
+                                  'heaviside',
+                                  'pharm',
+                                  'pulsed'})
+
+# defined experiments
+_ALLOWED_EXPERIMENTS = frozenset({'inoculant-survival',
+                                  'dose-survival',
+                                  'drug-regimen',
+                                  'equilibrium-time',
+                                  'dose-entropy',
+                                  'rate-survival',
+                                  'bottleneck',
+                                  'ramp_up_down',
+                                  'rate_survival_lhs'})
+
+def _run_one(args):
+    """Runs a single population simulation in a worker process.
+
+    Args:
+        args (tuple): Population class object and the np.random.SeedSequence
+            used to seed the worker's random number generator.
+
+    Returns:
+        tuple: counts and fixation time returned by Population.simulate()
+    """
+    pop, seed = args
+    np.random.seed(seed.generate_state(1))
+    pop.rng = np.random.default_rng(seed)
+    pop.plot = False # figures made in a worker process are lost
+    pop.n_workers = None # worker processes cannot start their own pool
+    return pop.simulate()
+
+def _canonicalize_counts(counts):
+    """Returns counts as a C-contiguous (n_timestep, n_genotype) array.
+
+    Axis 0 is time and axis 1 is genotype, so per-timestep sums (axis=1) and 
+    per-genotype traces (counts[:,g]) read memory in order.
+    """
+    return np.ascontiguousarray(counts)
+
+def _downcast(data_dict):
+    """Returns a copy of data_dict with its arrays in compact dtypes for saving.
+
+    counts is stored exactly as uint32 when it holds non-negative whole 
+    numbers (a single simulation) and as float32 otherwise (averaged counts). 
+    drug_curve and regimen are always stored as float32, so each key has the 
+    same dtype in every results file. Other entries are saved unchanged.
+    """
+    out = dict(data_dict)
+
+    counts = out.get('counts')
+    if isinstance(counts,np.ndarray) and counts.dtype.kind in 'fiu':
+        if (counts.size > 0 and np.all(np.mod(counts,1) == 0) 
+            and counts.min() >= 0 and counts.max() < 2**32):
+            out['counts'] = counts.astype(np.uint32)
+        else:
+            out['counts'] = counts.astype(np.float32)
+
+    for key in ('drug_curve','regimen'):
+        if key in out and out[key] is not None:
+            out[key] = np.asarray(out[key],dtype=np.float32)
+
+    return out
 
 class Experiment():
 
@@ -35,37 +102,20 @@ class Experiment():
                  passage_time = 48,
                  debug = True,
                  population_template=None,
-                 eq_times=None): # debug = True -> no save
+                 eq_times=None,
+                 n_workers=None): # debug = True -> no save
     
         self.root_path = str(dir_manager.get_project_root())
         
-        # list of allowed drug curve types
-        allowed_types = ['linear',
-                         'constant',
-                         'heaviside',
-                         'pharm',
-                         'pulsed']
-        
-        # list of defined experiments
-        allowed_experiments = ['inoculant-survival',
-                               'dose-survival',
-                               'drug-regimen',
-                               'equilibrium-time',
-                               'dose-entropy',
-                               'rate-survival',
-                               'bottleneck',
-                               'ramp_up_down',
-                               'rate_survival_lhs']
-        
         if not type(curve_types) == list:
             curve_types = [curve_types]
 
         if curve_types[0] is not None:
-            if not all(elem in allowed_types for elem in curve_types):
+            if not _ALLOWED_CURVE_TYPES.issuperset(curve_types):
                 raise Exception('One or more curve types is not recognized.\nAllowable types are: linear, constant, heaviside, pharm, pulsed.')
                 
         if experiment_type is not None:
-            if experiment_type not in allowed_experiments:
+            if experiment_type not in _ALLOWED_EXPERIMENTS:
                 raise Exception('Experiment type not recognized.\nAllowable types are inoculant-survival, dose-survival, drug-regimen, dose-entropy, and bottleneck.')
             
         # Curve type: linear, constant, heaviside, pharm, pulsed
@@ -85,6 +135,9 @@ class Experiment():
             self.inoculants = inoculants
             
         self.n_sims = n_sims
+
+        # number of worker processes for running simulations. None -> serial
+        self.n_workers = n_workers
             
         # Common options that are applied to each population
         self.population_options = population_options
@@ -161,14 +214,19 @@ class Experiment():
                 for inoculant in self.inoculants:
                     fig_title = 'Inoculant = ' + str(inoculant) + ', curve type = ' + curve_type
                     
-                    init_counts = np.zeros(16)
+                    p = Population(curve_type=curve_type,
+                                   n_sims = self.n_sims,
+                                   fig_title = fig_title,
+                                   **self.population_options)
+
+                    # the number of genotypes comes from the population's 
+                    # options or drug data, so size init_counts to match
+                    init_counts = np.zeros(p.n_genotype)
                     init_counts[0] = inoculant
-                    
-                    self.populations.append(Population(curve_type=curve_type,
-                                                      n_sims = self.n_sims,
-                                                      fig_title = fig_title,
-                                                      init_counts=init_counts,
-                                                      **self.population_options))
+                    p.init_counts = init_counts
+                    p.initialize_population()
+
+                    self.populations.append(p)
                     
             self.n_survive = np.zeros([len(self.curve_types),len(self.inoculants)])
             self.perc_survive = np.zeros([len(self.curve_types),len(self.inoculants)])
@@ -186,8 +244,7 @@ class Experiment():
                 p0 = population_template
 
             for prob_drop in self.prob_drops:
-                p = copy.copy(p0)
-                p.reset_drug_conc_curve(prob_drop=prob_drop)
+                p = p0.clone_with(prob_drop=prob_drop)
                 self.populations.append(p)
 
             self.n_survive = np.zeros([len(self.populations)])
@@ -210,8 +267,7 @@ class Experiment():
                 p0 = population_template
 
             for eq_time in self.eq_times:
-                p = copy.copy(p0)
-                p.reset_drug_conc_curve(dwell_time=eq_time)
+                p = p0.clone_with(dwell_time=eq_time)
                 self.populations.append(p)
             
         elif self.experiment_type == 'dose-entropy':
@@ -242,8 +298,7 @@ class Experiment():
                 # if curve_types[0] == 'pharm':
                     # print(population_options)
 
-                p = copy.copy(p0)
-                p.reset_drug_conc_curve(k_abs=slope)
+                p = p0.clone_with(k_abs=slope)
 
                 self.populations.append(p)                          
                     
@@ -255,30 +310,30 @@ class Experiment():
         
         if not debug and not (self.experiment_type == 'rate_survival_lhs'):
             
-            num = 0
-            num_str = str(num).zfill(4)
-            
             date_str = time.strftime('%m%d%Y',time.localtime())
             
             if results_folder is None:
-                self.results_folder = os.getcwd() + os.sep + 'results'
+                self.results_folder = os.path.join(os.getcwd(),'results')
             else:
                 self.results_folder = results_folder
 
-            if not os.path.exists(self.results_folder):
-                os.mkdir(self.results_folder)
+            os.makedirs(self.results_folder,exist_ok=True)
 
-            save_folder = self.results_folder + os.sep + 'results_' + date_str + '_' + num_str
-                
-            while(os.path.exists(save_folder)):
-                num += 1
-                num_str = str(num).zfill(4)
-                save_folder = self.results_folder + os.sep + 'results_' + date_str + '_' + num_str
+            # number the new folder after the highest existing one from today
+            prefix = 'results_' + date_str + '_'
+            nums = [int(d[len(prefix):]) for d in os.listdir(self.results_folder)
+                    if d.startswith(prefix) and d[len(prefix):].isdigit()]
+            num = max(nums,default=-1) + 1
+            num_str = str(num).zfill(4)
+
+            save_folder = os.path.join(self.results_folder,prefix + num_str)
             os.mkdir(save_folder) 
             
             self.results_path = save_folder
-            self.experiment_info_path = self.results_path + os.sep + 'experiment_info_' + date_str + '_' + num_str + '.p'
+            self.experiment_info_path = os.path.join(self.results_path,
+                f'experiment_info_{date_str}_{num_str}.p')
             self.exp_folders = []
+            self._save_folders = {} # save folder name -> path, for fast lookup
             
         # self.savename = None
         
@@ -300,27 +355,26 @@ class Experiment():
         
         if self.experiment_type == 'dose-survival':
             # pbar = tqdm(total = n_curves*n_doses) # progress bar
-            for curve_number in range(n_curves):
-                for dose_number in range(n_doses):
-                    
-                    exp_num = curve_number*n_doses + dose_number
-                    pop = self.populations[exp_num] # extract population in list of population
-                    c,n_survive_t = pop.simulate()
-                    pop.plot_timecourse()
-                    self.n_survive[curve_number,dose_number] = n_survive_t
-                    # pbar.update()
+            results = list(self.simulate_populations(self.populations))
+            for pop in self.populations:
+                pop.plot_timecourse()
+                # pbar.update()
+
+            # populations are ordered by curve type, then dose
+            n_survive = np.fromiter((r[1] for r in results),dtype=float,
+                                    count=len(results))
+            self.n_survive = n_survive.reshape(n_curves,n_doses)
             self.perc_survive = 100*self.n_survive/self.n_sims   
         
         elif self.experiment_type == 'ramp_up_down':
             counts_landscape, ft = self.p_landscape.simulate()
-            drug_curve = self.p_landscape.drug_curve
-            drug_curve= np.array([drug_curve])
-            drug_curve = np.transpose(drug_curve)
+            drug_curve = np.asarray(self.p_landscape.drug_curve).reshape(-1,1)
             counts_seascape, ft = self.p_seascape.simulate()
             
             if not self.debug:
                 
-                pickle.dump(self, open(self.experiment_info_path,"wb"))
+                with open(self.experiment_info_path,"wb") as f:
+                    pickle.dump(self, f, protocol=5)
                 data_dict_landscape = {'counts':counts_landscape,
                                 'drug_curve':drug_curve}
                 self.save_dict(data_dict_landscape,save_folder='null_seascape')
@@ -337,15 +391,15 @@ class Experiment():
         
         elif self.experiment_type == 'inoculant-survival':
             # pbar = tqdm(total = n_curves*n_inoc) # progress bar
-            for curve_number in range(n_curves):
-                for inoc_num in range(n_inoc):
-                    
-                    exp_num = curve_number*n_inoc + inoc_num
-                    pop = self.populations[exp_num] # extract population in list of population
-                    c,n_survive_t = pop.simulate()
-                    pop.plot_timecourse()
-                    self.n_survive[curve_number,inoc_num] = n_survive_t
-                    # pbar.update()           
+            results = list(self.simulate_populations(self.populations))
+            for pop in self.populations:
+                pop.plot_timecourse()
+                # pbar.update()
+
+            # populations are ordered by curve type, then inoculant
+            n_survive = np.fromiter((r[1] for r in results),dtype=float,
+                                    count=len(results))
+            self.n_survive = n_survive.reshape(n_curves,n_inoc)
             self.perc_survive = 100*self.n_survive/self.n_sims
             
         elif self.experiment_type == 'rate_survival_lhs':
@@ -355,12 +409,13 @@ class Experiment():
             for p in self.populations:
                 
                 counts_list = []
-                for n in range(self.n_sims):
-                    counts,n_survive = p.simulate()
-                    c = np.sum(counts,axis=1)
+                results = self.simulate_populations([p]*self.n_sims)
+                for counts,n_survive in results:
+                    c = counts.sum(axis=1)
                     counts_list.append(c)
                 
-                p_survived = stats.survival_proportion(p,counts_list)
+                p_survived = stats.survival_proportion(p,counts_list,
+                                                       presummed=True)
                 p_survived_list.append(p_survived)
             
             # res = max(p_survived_list) - min(p_survived_list)
@@ -375,17 +430,19 @@ class Experiment():
                 save_folder = 'p_drop=' + str(p.prob_drop)
                 save_folder = save_folder.replace('.',',')
                 # self.exp_folder.append(save_folder)
+                sims = []
+                regimens = []
                 for i in range(self.n_sims):
                     # initialize new drug curve
-                    p.drug_curve,u = p.gen_curves()
-                    
-                    counts,n_survive = p.simulate()
-                    drug = p.drug_curve
-                    drug = np.array([drug])
-                    drug = np.transpose(drug)
-                    
-                    u = np.array([u,])
-                    u = u.transpose()
+                    p_t = copy.copy(p)
+                    p_t.drug_curve,u = p_t.gen_curves()
+                    sims.append(p_t)
+                    regimens.append(u)
+
+                results = self.simulate_populations(sims)
+                for i,(counts,n_survive) in enumerate(results):
+                    drug = np.asarray(sims[i].drug_curve).reshape(-1,1)
+                    u = np.asarray(regimens[i]).reshape(-1,1)
                     # counts = np.concatenate((counts,drug,u),axis=1)
   
                     if not self.debug:
@@ -396,21 +453,19 @@ class Experiment():
                         self.save_dict(data_dict,save_folder,num=i)
                 # kk+=1
                 # pbar.update()
-                self.perc_survive = 100*self.n_survive/self.n_sims
+            self.perc_survive = 100*self.n_survive/self.n_sims
 
         elif self.experiment_type == 'equilibrium-time':
 
             for p in self.populations:
                 save_folder = 'eq_time=' + str(p.dwell_time)
 
-                for i in range(self.n_sims):
+                results = self.simulate_populations([p]*self.n_sims)
+                for i,(counts,n_survive) in enumerate(results):
                     # initialize new drug curve
                     # p.drug_curve,u = p.gen_curves()
                     
-                    counts,n_survive = p.simulate()
-                    drug = p.drug_curve
-                    drug = np.array([drug])
-                    drug = np.transpose(drug)
+                    drug = np.asarray(p.drug_curve).reshape(-1,1)
                     
                     if not self.debug:
                         # self.save_counts(counts,i,save_folder)
@@ -425,6 +480,7 @@ class Experiment():
             # pbar = tqdm(total=len(self.populations)*self.n_sims)
             e_survived = []
             e_died = []
+            entropy_results = []
             for p in self.populations:
                 
                 for i in range(self.n_sims):
@@ -442,94 +498,134 @@ class Experiment():
                         survive = 'extinct' # died
                         e_died.append(e_t)      
                         
-                    d = {'dose':[p.max_dose],
-                         'survive condition':[survive],
-                         'max entropy':[e]}
-                    
-                    entropy_results_t = pd.DataFrame(d)
-                    self.entropy_results = self.entropy_results.append(entropy_results_t)
+                    entropy_results.append({'dose':p.max_dose,
+                                            'survive condition':survive,
+                                            'max entropy':e})
                     # pbar.update()
+
+            # build the dataframe once rather than appending row by row
+            self.entropy_results = pd.DataFrame.from_records(entropy_results)
         
         elif self.experiment_type == 'rate-survival':
             # pbar = tqdm(total=len(self.populations))
             
             for p in self.populations:
                 
-                for n in range(self.n_sims):
-                    counts,n_survive = p.simulate()
+                if (self.curve_types[0] == 'pharm' or 
+                    self.curve_types[0] == 'pulsed'):
+                    save_folder = 'k_abs=' + str(p.k_abs)
+                    save_folder.replace('.',',')
+                else:
+                    save_folder = 'slope=' + str(p.k_abs)
+                    save_folder.replace('.',',')
+
+                results = self.simulate_populations([p]*self.n_sims)
+                for n,(counts,n_survive) in enumerate(results):
                     
-                    drug = p.drug_curve
-                    drug = np.array([drug])
-                    drug = np.transpose(drug)
+                    drug = np.asarray(p.drug_curve).reshape(-1,1)
                     # counts = np.concatenate((counts,drug),axis=1)
                     
                     if self.debug is False:
-                        if (self.curve_types[0] == 'pharm' or 
-                            self.curve_types[0] == 'pulsed'):
-                            save_folder = 'k_abs=' + str(p.k_abs)
-                            save_folder.replace('.',',')
-                        else:
-                            save_folder = 'slope=' + str(p.k_abs)
-                            save_folder.replace('.',',')
                         # self.save_counts(counts,n,save_folder)
                         data_dict = {'counts':counts,
                                      'drug_curve':drug}
                         self.save_dict(data_dict,save_folder,num=n)
         if not self.debug:
-            pickle.dump(self, open(self.experiment_info_path,"wb"))
+            with open(self.experiment_info_path,"wb") as f:
+                pickle.dump(self, f, protocol=5)
   
+    def simulate_populations(self,populations):
+        """Calls simulate() on each population object in populations.
+
+        Simulations are independent of each other, so if self.n_workers > 1 
+        they are distributed across a multiprocessing pool. Each task gets its 
+        own random stream spawned from a single SeedSequence, which is itself 
+        seeded from np.random so that np.random.seed() keeps experiments 
+        reproducible. Population objects are not plotted in worker processes.
+
+        Results are yielded in order as they complete, so callers can save 
+        each one without holding every simulation of a condition in memory.
+
+        Args:
+            populations (list): list of Population class objects. The same 
+                object may appear more than once.
+
+        Yields:
+            tuple: (counts, fixation_time) for each population, in order.
+        """
+        if self.n_workers is None or self.n_workers <= 1:
+            for p in populations:
+                counts,fixation_time = p.simulate()
+                yield _canonicalize_counts(counts),fixation_time
+        else:
+            ss = np.random.SeedSequence(np.random.randint(2**31 - 1))
+            seeds = ss.spawn(len(populations))
+
+            with multiprocessing.Pool(self.n_workers) as pool:
+                results = pool.imap(_run_one, zip(populations,seeds))
+                for p,(counts,fixation_time) in zip(populations,results):
+                    # simulate() stores the counts on the population, do the 
+                    # same here
+                    p.counts = counts
+                    yield _canonicalize_counts(counts),fixation_time
+
+    def get_save_folder(self,save_folder):
+        """Returns the path to save_folder in self.results_path.
+
+        The folder is created and added to self.exp_folders the first time it 
+        is requested.
+        """
+        if save_folder is None:
+            save_folder = ''
+        
+        folder_path = self._save_folders.get(save_folder)
+
+        if folder_path is None:
+            folder_path = os.path.join(self.results_path,save_folder)
+            os.makedirs(folder_path,exist_ok=True)
+            self._save_folders[save_folder] = folder_path
+            self.exp_folders.append(folder_path)
+
+        return folder_path
+
     # save counts as a csv in the given subfolder with the label 'num'
     def save_counts(self,counts,num,save_folder,prefix='sim_'):
         
-        # check if the desired save folder exists. If not, create it
-        if save_folder is None:
-            save_folder = ''
-        folder_path = self.results_path + os.sep + save_folder
-        if os.path.exists(folder_path) != True:
-            os.mkdir(folder_path)
+        folder_path = self.get_save_folder(save_folder)
         
         if num is None:
             num = ''
         else:
             num = str(num).zfill(4)
             
-        savename = self.results_path + os.sep + save_folder + os.sep + prefix + num + '.csv'
+        savename = os.path.join(folder_path,f'{prefix}{num}.csv')
         np.savetxt(savename, counts, delimiter=",")
         # self.savename = savename
         return
     
     def save_dict(self,data_dict,save_folder,num=None,prefix='sim_'):
-        # check if the desired save folder exists. If not, create it
-        if save_folder is None:
-            save_folder = ''
-        
-        folder_path = self.results_path + os.sep + save_folder
-
-        if os.path.exists(folder_path) != True:
-            os.mkdir(folder_path)
+        # create the save folder the first time it is used
+        folder_path = self.get_save_folder(save_folder)
         
         if num is None:
             num = ''
         else:
             num = str(num).zfill(4)
         
-        if folder_path not in self.exp_folders:
-            self.exp_folders.append(folder_path)
-        
-        savename = self.results_path + os.sep + save_folder + os.sep + prefix + num + '.p'
+        savename = os.path.join(folder_path,f'{prefix}{num}.p')
         
-        pickle.dump(data_dict, open(savename,"wb"))
+        with open(savename,"wb") as f:
+            pickle.dump(_downcast(data_dict), f, protocol=5)
         # np.savetxt(savename, counts, delimiter=",")
         return
     
     def compute_regimen(self,p,u):
         gap = int(p.dose_schedule/p.timestep_scale)
         n_impulse = int(np.ceil(p.n_timestep/gap))
-        regimen = np.zeros(n_impulse)
-        
-        for i in range(n_impulse):
-            if u[(i)*gap] == 1:
-                regimen[i] = 1
+
+        # sample u at each scheduled dose time
+        u = np.asarray(u)
+        regimen = (u[:n_impulse*gap:gap] == 1).astype(float)
                 
         return regimen
         
@@ -545,18 +641,29 @@ class Experiment():
                  self.transition_times[1]-buffer,
                  self.transition_times[1]+buffer]
         
-        for t in range(n_timestep):
-            if t<times[0]:
-                drug_curve[t] = self.first_dose
-            elif t<times[1]:
-                drug_curve[t] = drug_curve[t-1]+slope
-            elif t<times[2]:
-                drug_curve[t] = self.second_dose
-            elif (t<times[3] and 
-                  drug_curve[t-1]+slope<self.third_dose):
-                drug_curve[t] = drug_curve[t-1]+slope
-            else:
-                drug_curve[t] = self.third_dose
+        # first timestep of each segment of the curve
+        times = np.clip(np.ceil(times),0,n_timestep).astype(int)
+        t0,t1,t2,t3 = np.maximum.accumulate(times).tolist()
+
+        drug_curve[:t0] = self.first_dose
+
+        ramp = np.arange(1,t1-t0+1)*slope
+        drug_curve[t0:t1] = drug_curve[t0-1] + ramp
+
+        drug_curve[t1:t2] = self.second_dose
+
+        ramp = np.arange(1,t3-t2+1)*slope
+        x0 = drug_curve[t2-1]
+        if slope > 0:
+            # keep ramping until the curve reaches third_dose
+            drug_curve[t2:t3] = np.minimum(x0 + ramp,self.third_dose)
+        elif x0 + slope < self.third_dose:
+            drug_curve[t2:t3] = x0 + ramp
+        else:
+            # starts above third_dose: drop to it, then keep ramping down
+            drug_curve[t2:t3] = self.third_dose + ramp - slope
+
+        drug_curve[t3:] = self.third_dose
                 
         p.drug_curve = drug_curve
         
@@ -593,13 +700,13 @@ class Experiment():
             c = np.sum(counts,axis=1)
         else:
             c = counts
-        e = np.argwhere(c<thresh)
-        if len(e) == 0:
+        e = stats.first_below(c,thresh)
+        if e == -1:
             event_obs = 0
             event_time = len(c)
         else:
             event_obs = 1
-            event_time = e[0]
+            event_time = e
         
         timestep_scale = pop.timestep_scale
         event_time = event_time*timestep_scale
@@ -616,13 +723,13 @@ class Experiment():
         if thresh < 1:
             thresh = thresh*pop.max_cells
             
-        e = np.argwhere(c>thresh)
-        if len(e) == 0:
+        e = stats.first_above(c,thresh)
+        if e == -1:
             event_obs = 0
             event_time = len(c)
         else:
             event_obs = 1
-            event_time = e[0]
+            event_time = e
         
         timestep_scale = pop.timestep_scale
         event_time = event_time*timestep_scale
@@ -632,8 +739,11 @@ class Experiment():
     def log_rank_test(self,durations_A, durations_B, 
                       event_observed_A=None, event_observed_B=None):
         
-        results = lifelines.statistics.logrank_test(durations_A, durations_B, 
-                                          event_observed_A=event_observed_A,
-                                          event_observed_B=event_observed_B)
+        # lifelines is slow to import and only needed here
+        from lifelines.statistics import logrank_test
+
+        results = logrank_test(durations_A, durations_B, 
+                               event_observed_A=event_observed_A,
+                               event_observed_B=event_observed_B)
         
         return results
\ No newline at end of file
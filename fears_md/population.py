@@ -8,8 +8,74 @@ import numpy as np
 import math
 from importlib_resources import files
 from fears_md.utils import dir_manager, pharm, fitness, plotter, AutoRate
-import pandas as pd
 import os
+import copy
+import functools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+@functools.lru_cache(maxsize=None)
+def _hamming_transition_matrix(N):
+    """Mutation transition matrix between N genotypes, computed with bitwise ops.
+
+    Genotypes g and h are neighbors if g^h has exactly one bit set. The result 
+    is cached and shared, so it is returned read-only.
+    """
+    g = np.arange(N)
+    x = g[:,None] ^ g[None,:]
+
+    # popcount of g^h is the Hamming distance
+    dist = np.zeros_like(x)
+    while x.any():
+        dist += x & 1
+        x >>= 1
+
+    trans_mat = (dist == 1).astype(float)
+    trans_mat = trans_mat/trans_mat.sum(axis=1)
+    # columns are the per-genotype distributions, keep them contiguous
+    trans_mat = np.asfortranarray(trans_mat)
+    trans_mat.flags.writeable = False
+    return trans_mat
+
+@functools.lru_cache(maxsize=None)
+def _hamming_neighbors(N):
+    """Table of the Hamming distance 1 neighbors of each of N genotypes.
+
+    Row g holds g^(1<<k) for each allele k, so every column is a permutation 
+    of the genotypes. The result is cached and shared, so it is returned 
+    read-only.
+    """
+    n_allele = int(N).bit_length() - 1
+    g = np.arange(N)
+    neighbors = g[:,None] ^ (1 << np.arange(n_allele))[None,:]
+    neighbors.flags.writeable = False
+    return neighbors
+
+def _run_abm_worker(args):
+    """Runs a single simulation of pop in a worker process.
+
+    Args:
+        args (tuple): Population class object and the np.random.SeedSequence 
+            used to seed the worker's random number generator.
+
+    Returns:
+        tuple: counts and timestep returned by Population.run_abm()
+    """
+    pop, seed = args
+    pop.rng = np.random.default_rng(seed)
+    return pop.run_abm()
+
+def _sweep_worker(args):
+    """Computes the drug concentration curve of pop for one parameter value.
+
+    Args:
+        args (tuple): Population class object, parameter name and value.
+
+    Returns:
+        numpy array: drug concentration curve
+    """
+    pop, param_name, value = args
+    return pop.clone_with(**{param_name:value}).drug_curve
 
 class PopParams:
     """Population parameters class
@@ -103,11 +169,18 @@ class PopParams:
         pad_right (bool):
         max_dose (float): maximum drug concentration in drug concentration curve.
         dose_schedule (int): hours between doses. Defaults to 24.
+        duty_cycle (float): fraction of each dose_schedule that drug is on for 
+            the 'on_off' curve type. If None, 0.5 is used. Defaults to None.
 
         stop_condition (bool): if true, stops the simulation when the most frequent 
             genotype is also the most fit genotype.
         n_sims (int): number of times run_abm is called in simulate. Defaults to 10.
+        n_workers (int): number of worker processes used by simulate. If None or 
+            1, simulations run serially. Defaults to None.
         debug (bool): if true, abm() prints some values useful for debugging.
+        seed (int): seed for the population's random number generator (rng). If 
+            None, the generator is seeded with fresh entropy and np.random is 
+            left untouched. Defaults to None.
 
 
     """
@@ -146,9 +219,14 @@ class PopParams:
         self.drug_list = None
         self.pk_library = None
         self.pd_library = None
+        self.pd_params = None # set by set_pd_params
 
         self.drug_curve_dict = None # for storing multiple drug curves for different drugs
         self.drug_impulse_dict = None
+        self.drug_curve = None # set by set_drug_curve
+        self.impulses = None
+        self.drug_curve_mat = None # drug_curve_dict stacked as (n_drugs, n_timestep)
+        self.drug_idx = None # row of each drug in drug_curve_mat
 
         min_dc = np.log10(self.seascape_drug_conc[1])
         max_dc = np.log10(max(self.seascape_drug_conc))
@@ -192,6 +270,7 @@ class PopParams:
         self.pad_right = True
         self.max_dose = 10
         self.dose_schedule = 24
+        self.duty_cycle = None
         self.dwell = False
         self.dwell_time = 48
         self.regimen_length = None
@@ -199,7 +278,9 @@ class PopParams:
         self.stop_condition = None
         self.plot = True
         self.n_sims = 10
+        self.n_workers = None
         self.debug = False
+        self.seed = None
 
         self.drugless_limits=[1,1.5]
         self.ic50_limits=[-3,3]
@@ -215,11 +296,10 @@ class PopParams:
         self.drugless_rates = None
 
 
-        for paramkey in self.__dict__.keys():
-            for optkey in kwargs.keys():
-                if paramkey == optkey:
-                    td = {paramkey:kwargs.get(paramkey)}
-                    self.__dict__.update(td)
+        attrs = self.__dict__
+        for key, value in kwargs.items():
+            if key in attrs:
+                attrs[key] = value
 
 
 class Population(PopParams):
@@ -313,16 +393,26 @@ class Population(PopParams):
         pad_right (bool):
         max_dose (float): maximum drug concentration in drug concentration curve.
         dose_schedule (int): hours between doses. Defaults to 24.
+        duty_cycle (float): fraction of each dose_schedule that drug is on for 
+            the 'on_off' curve type. If None, 0.5 is used. Defaults to None.
 
         stop_condition (bool): if true, stops the simulation when the most frequent 
             genotype is also the most fit genotype.
         n_sims (int): number of times run_abm is called in simulate. Defaults to 10.
+        n_workers (int): number of worker processes used by simulate. If None or 
+            1, simulations run serially. Defaults to None.
         debug (bool): if true, abm() prints some values useful for debugging.
+        seed (int): seed for the population's random number generator (rng). If 
+            None, the generator is seeded with fresh entropy and np.random is 
+            left untouched. Defaults to None.
     """
 
     def __init__(self,**kwargs):
         super().__init__(**kwargs)
 
+        # default_rng(None) draws its entropy from the OS, not from np.random
+        self.rng = np.random.default_rng(self.seed)
+
         self.load_drug_libraries()
 
         self.initialize_drug_curves()
@@ -373,12 +463,26 @@ class Population(PopParams):
             if not set(pk_drugs) == set(dc_drugs):
                 raise Warning('Drug list mismatch between pharmacokinetic library and drug curve dictionary.')
 
+        self.set_drug_curve_mat()
+
+    def set_drug_curve_mat(self):
+        """Stacks drug_curve_dict into a (n_drugs, n_timestep) array.
+
+        Sets drug_curve_mat and drug_idx, a dict mapping each drug to its row, 
+        so the drug concentrations at a timestep are a single column read.
+        """
+        drugs = list(self.drug_curve_dict.keys())
+        self.drug_idx = {drug:i for i,drug in enumerate(drugs)}
+        self.drug_curve_mat = np.ascontiguousarray(
+            np.stack([self.drug_curve_dict[drug] for drug in drugs]),
+            dtype=float)
+
     def load_drug_libraries(self):
         """Loads pharmacokinetic and pharmacodynamic libraries from excel files.
         """
 
-        self.pk_library = pd.read_excel(self.pharmacokinetics_file)
-        self.pd_library = pd.read_excel(self.pharmacodynamics_file)
+        self.pk_library = dir_manager.load_drug_library(self.pharmacokinetics_file)
+        self.pd_library = dir_manager.load_drug_library(self.pharmacodynamics_file)
 
         # check for drug list mismatch
         if self.drug_list is not None:
@@ -394,6 +498,32 @@ class Population(PopParams):
         else:
             self.drug_list = self.pk_library['drug'].unique()
 
+        self.set_pd_params()
+
+    def set_pd_params(self):
+        """Builds a pharmacodynamic parameter table for each drug.
+
+        Sets pd_params, a dict mapping each drug in pd_library to a C-ordered 
+        (n_genotype, 4) array. Row g holds (gmax, gmin, ic50, hc) for genotype 
+        g, so a fitness lookup reads a genotype's parameters from one place 
+        instead of filtering the library.
+        """
+        cols = ['gmax','gmin','ic50','hc']
+        n_genotype = len(self.pd_library['genotype'].unique())
+
+        self.pd_params = {}
+        for drug,df in self.pd_library.groupby('drug',sort=False):
+            params = np.full((n_genotype,len(cols)),np.nan)
+            params[df['genotype'].to_numpy()] = df[cols].to_numpy(dtype=float)
+            self.pd_params[drug] = params
+
+    def set_scaled_rates(self):
+        """Scales the death and mutation rates by timestep_scale for use in abm.
+        """
+        self._death_rate_ts = self.death_rate*self.timestep_scale
+        self._mut_rate_ts = self.mut_rate*self.timestep_scale
+        self._mut_rate_nallele_ts = self._mut_rate_ts*self.n_allele
+
     def initialize_population(self):
         """Initializes population parameters and counts.
         """
@@ -408,6 +538,13 @@ class Population(PopParams):
         # initialize counts
         self.counts = np.zeros([self.n_timestep,self.n_genotype])
 
+        # scratch space for the constant population normalization and the 
+        # pharmacodynamic death model in abm
+        self._counts_buf = np.empty(self.n_genotype,dtype=np.float64)
+        self._buf_dead = np.empty(self.n_genotype,dtype=np.int64)
+
+        self.set_scaled_rates()
+
         if self.init_counts is None:
             self.init_counts = np.zeros(self.n_genotype)
             self.init_counts[0] = 10**6
@@ -446,7 +583,8 @@ class Population(PopParams):
     def int_to_binary(self,num):
         """
         Converts an integer to binary representation with the number of 
-        digits equal to the number of alleles in the model.
+        digits equal to the number of alleles in the model. Intended for 
+        labels; use bitwise operations on integer genotypes for computation.
 
         Parameters
         ----------
@@ -462,13 +600,39 @@ class Population(PopParams):
         pad = int(math.log(self.n_genotype,2))
         return bin(num)[2:].zfill(pad)
     
+    def hamming_distance(self,g1,g2):
+        """
+        Hamming distance between two genotypes, computed as popcount(g1^g2).
+
+        Parameters
+        ----------
+        g1, g2 : int
+            Genotypes as integers.
+
+        Returns
+        -------
+        int
+            Number of alleles that differ between g1 and g2.
+        """
+        x = int(g1) ^ int(g2)
+        try:
+            return x.bit_count()
+        except AttributeError: # python < 3.10
+            return bin(x).count('1')
+
     # computes hamming distance between two genotypes
     def hammingDistance(self,s1,s2):
+        warnings.warn('hammingDistance is deprecated, use hamming_distance '
+                      'with integer genotypes instead.',DeprecationWarning,
+                      stacklevel=2)
         assert len(s1) == len(s2)
         return sum(ch1 != ch2 for ch1, ch2 in zip(s1, s2))
     
     # converts an integer to a genotype and padding to the left by 0s
     def convertIntToGenotype(self,anInt,pad):
+        warnings.warn('convertIntToGenotype is deprecated, genotypes are '
+                      'handled as integers with bitwise operations.',
+                      DeprecationWarning,stacklevel=2)
         offset = 2**pad
         return [int(x) for x in bin(offset+anInt)[3:]]
     
@@ -485,27 +649,45 @@ class Population(PopParams):
         Returns
         -------
         trans_mat : numpy array
-            Mutation transition matrix.
+            Mutation transition matrix (read-only, shared between calls).
         """
-        trans_mat = np.zeros([N,N])
-        for mm in range(N):
-            for nn in range(N):
-                trans_mat[mm, nn] = self.hammingDistance( 
-                    self.int_to_binary(mm) , self.int_to_binary(nn))
+        return _hamming_transition_matrix(N)
 
-        trans_mat[trans_mat>1] = 0
-        trans_mat = trans_mat/trans_mat.sum(axis=1)
-        return trans_mat
+    def get_fittest_genotype(self):
+        """
+        Finds the genotype with the highest growth rate at max_dose.
+
+        As in gen_abm_fl_md, the growth rate of each genotype is the minimum 
+        over all drugs in drug_curve_dict.
 
-    def check_stop_cond(self,counts,mm):
-        final_landscape = self.gen_fit_land(self.max_dose)
-        fittest_genotype = final_landscape.argmax()
+        Returns
+        -------
+        int
+            Index of the fittest genotype.
+        """
+        fit_land = None
+        for drug in self.drug_curve_dict:
+            fit_land_d = self.gen_fit_land(self.max_dose,drug)
+            if fit_land is None:
+                fit_land = fit_land_d
+            else:
+                fit_land = np.minimum(fit_land,fit_land_d)
+        return int(fit_land.argmax())
+
+    def check_stop_cond(self,counts,mm,fittest_genotype=None):
+        # fittest_genotype can be precomputed since max_dose is fixed during a run
+        if fittest_genotype is None:
+            fittest_genotype = self.get_fittest_genotype()
         
-        most_frequent_genotype = counts.argmax()
         stop_cond = False
-        
-        if fittest_genotype == most_frequent_genotype:
-            stop_cond = True
+
+        # Until the fittest genotype appears it cannot be the most frequent 
+        # one, so the argmax over all genotypes can be skipped. The exception 
+        # is genotype 0, which argmax returns when every count is 0.
+        if counts[fittest_genotype] > 0 or fittest_genotype == 0:
+            most_frequent_genotype = counts.argmax()
+            if fittest_genotype == most_frequent_genotype:
+                stop_cond = True
         
         if mm >= self.n_timestep:
             raise Warning('Stop condition not reached. Increase n_timestep or adjust model parameters.')
@@ -533,13 +715,11 @@ class Population(PopParams):
 
         """
         
-        if (np.mod(mm*self.timestep_scale,self.passage_time) == 0 
-            and not mm == 0 and self.passage):
+        if (self.passage and not mm == 0 
+            and np.mod(mm*self.timestep_scale,self.passage_time) == 0):
 
-            counts = np.divide(counts,self.dilution)
-            counts[counts<1] == 0
-            counts = [int(c) for c in counts]
-            counts = np.array(counts)
+            counts = (counts // self.dilution).astype(np.int64)
+            counts[counts<1] = 0
 
         return counts
 
@@ -557,7 +737,9 @@ class Population(PopParams):
         n_genotype : int
             Number of genotypes in the model.
         P : numpy array
-            Mutation matrix (Hamming distance 1)
+            Mutation matrix (Hamming distance 1). Column g is the distribution 
+            of mutations from genotype g. Mutations are drawn from the 
+            equivalent neighbor table, so P is only kept for compatibility.
         counts : numpy array
             Matrix of simulated cell counts.
             """
@@ -568,8 +750,7 @@ class Population(PopParams):
         fit_land = fitness.gen_abm_fl_md(self,mm,counts)
         
         fit_land = fit_land*self.timestep_scale
-        death_rate = self.death_rate*self.timestep_scale
-        mut_rate = self.mut_rate*self.timestep_scale
+        death_rate = self._death_rate_ts
          
         # Passage cells
         
@@ -580,26 +761,23 @@ class Population(PopParams):
         if self.death_model == 'pharmacodynamic':
             negative_fitness = fit_land < 0
             fit_land = np.abs(fit_land)
-            delta_cells = np.random.poisson(counts_t*fit_land)
-            delta_cells[negative_fitness] = -1*delta_cells[negative_fitness]
-
-            # dead cells from background turnover
-            dead_cells_turnover = -1*np.random.poisson(counts_t*death_rate)
+            delta_cells = self.rng.poisson(counts_t*fit_land)
+            np.negative(delta_cells,out=delta_cells,where=negative_fitness)
 
-            dead_cells = np.copy(delta_cells)
-            dead_cells[dead_cells>0] = 0
-            dead_cells = dead_cells + dead_cells_turnover
+            # dead cells from negative growth and background turnover
+            dead_cells = np.minimum(delta_cells,0,out=self._buf_dead)
+            dead_cells -= self.rng.poisson(counts_t*death_rate)
 
             counts_t = counts_t + dead_cells
 
-            daughter_counts = np.copy(delta_cells)
-            daughter_counts[daughter_counts<0] = 0
+            # delta_cells is not needed after this, so clip it in place
+            daughter_counts = np.maximum(delta_cells,0,out=delta_cells)
 
         else:
 
-            counts_t = counts_t - np.random.poisson(counts*death_rate) # background turnover
+            counts_t = counts_t - self.rng.poisson(counts*death_rate) # background turnover
         
-            daughter_counts = np.random.poisson(counts_t*fit_land)
+            daughter_counts = self.rng.poisson(counts_t*fit_land)
 
         if self.debug and np.mod(mm,10) == 0:
             print(str(mm))
@@ -609,33 +787,38 @@ class Population(PopParams):
             print(str(dead_cells))
             print('\n')
 
-        # Make sure there aren't negative numbers
-        neg_indx = counts_t < 0
-        counts_t[neg_indx] = 0
+        # Make sure there aren't negative numbers. counts_t is a new array in 
+        # both branches above, so it can be clipped in place.
+        np.maximum(counts_t,0,out=counts_t)
         
-        for genotype in np.arange(n_genotype):
-            
-            n_mut = np.random.poisson(
-                daughter_counts[genotype]*mut_rate*self.n_allele)
-
-            # Substract mutating cells from that allele
-            daughter_counts[genotype] -= n_mut
-            
-            # Mutate cells
-            mutations = np.random.choice(n_genotype, 
-                                         size=n_mut, 
-                                         p=P[:,genotype]).astype(np.uint8)
-
-            # Add mutating cell to their final types
-            counts_t += np.bincount( mutations , minlength=n_genotype )
+        n_mut = self.rng.poisson(daughter_counts*self._mut_rate_nallele_ts)
+
+        # Substract mutating cells from each genotype
+        daughter_counts -= n_mut
+
+        # Mutate cells and add them to their final types. Each genotype has 
+        # one equally likely neighbor per allele, so the multinomial draw is 
+        # split into conditional binomials over the neighbor columns, all 
+        # genotypes at once.
+        neighbors = _hamming_neighbors(n_genotype)
+        n_neighbor = neighbors.shape[1]
+        for k in range(n_neighbor):
+            if k < n_neighbor - 1:
+                n_k = self.rng.binomial(n_mut, 1/(n_neighbor-k))
+            else:
+                n_k = n_mut
+            n_mut = n_mut - n_k
+            # neighbors[:,k] is a permutation, so there are no repeated indices
+            counts_t[neighbors[:,k]] += n_k
 
         counts_t += daughter_counts
 
         # Normalize to constant population            
         if self.constant_pop:
-            scale = self.max_cells/np.sum(counts_t)
-            counts_t = counts_t*scale
-            counts_t = np.ceil(counts_t).astype('int')
+            scale = self.max_cells/counts_t.sum()
+            np.multiply(counts_t,scale,out=self._counts_buf)
+            np.ceil(self._counts_buf,out=self._counts_buf)
+            counts_t = self._counts_buf.astype(np.int64)
         
         return counts_t
     
@@ -652,6 +835,10 @@ class Population(PopParams):
         """
         
         n_genotype = self.n_genotype
+
+        # drug_curve_dict and the rates may have been changed since the last run
+        self.set_drug_curve_mat()
+        self.set_scaled_rates()
         
         # Get transition matrix
         P = self.random_mutations( n_genotype )
@@ -663,21 +850,24 @@ class Population(PopParams):
         # Default: run for n_timestep
         
         if self.stop_condition:
-            counts = np.zeros( [1,n_genotype] , dtype=int)
-            counts[0,:] = self.init_counts
+            # collect rows in a list and stack once at the end rather than
+            # reallocating the whole history every timestep
+            history = [np.asarray(self.init_counts).astype(np.int64)]
             stop_condition = False
+
+            fittest_genotype = self.get_fittest_genotype()
             
             while not stop_condition:
-                counts_t = self.abm(mm,n_genotype,P,counts[mm])
-                if len(counts.shape) == 1:
-                    counts = np.append([counts],[counts_t],axis=0)
-                else:
-                    counts = np.append(counts,[counts_t],axis=0)
-                    mm+=1
-                stop_condition = self.check_stop_cond(counts_t,mm)    
+                counts_t = self.abm(mm,n_genotype,P,history[mm])
+                history.append(counts_t)
+                mm+=1
+                stop_condition = self.check_stop_cond(counts_t,mm,
+                                                      fittest_genotype)
+            
+            counts = np.stack(history)
             
         else:
-            counts = np.zeros( [self.n_timestep, n_genotype] , dtype=int)
+            counts = np.zeros( [self.n_timestep, n_genotype] , dtype=np.int64)
             counts[0,:] = self.init_counts
             
             while mm < self.n_timestep - 1:
@@ -693,7 +883,8 @@ class Population(PopParams):
         Returns
         -------
         avg_counts : numpy array
-            Matrix of average cell counts over n_sims simulations.
+            Matrix of average cell counts over n_sims simulations, with shape 
+            (n_timestep, n_genotype). Axis 0 is time and axis 1 is genotype.
         fixation_time : list
             List of timesteps at which the most frequent genotype is also the most fit genotype.
             """
@@ -702,10 +893,19 @@ class Population(PopParams):
         avg_counts = np.zeros([self.n_timestep,self.n_genotype])
         fixation_time = []
         
+        if self.n_workers is None or self.n_workers <= 1 or self.n_sims <= 1:
+            results = (self.run_abm() for i in range(self.n_sims))
+        else:
+            # simulations are independent, give each its own random stream
+            ss = np.random.SeedSequence(self.rng.integers(2**31 - 1))
+            seeds = ss.spawn(self.n_sims)
+            with ProcessPoolExecutor(self.n_workers) as ex:
+                results = list(ex.map(_run_abm_worker,
+                                      [(self,seed) for seed in seeds]))
+
         # n_survive = 0
-        for i in range(self.n_sims):
+        for counts, mm in results:
             
-            counts, mm = self.run_abm()
             avg_counts += counts
             fixation_time.append(mm)
 
@@ -734,9 +934,18 @@ class Population(PopParams):
     ###########################################################################
     # wrapper methods for fitness
 
-    def gen_fit_land(self,conc,**kwargs):
+    def gen_fit_land(self,conc,drug):
+        """Generates the fitness landscape at a given drug concentration
 
-        fit_land = fitness.gen_fit_land(self,conc,**kwargs)
+        Args:
+            conc (float): drug concentration
+            drug (str): name of the drug in the population's drug libraries
+
+        Returns:
+            np.ndarray: growth rates per genotype
+        """
+
+        fit_land = fitness.gen_fit_land(self,conc,drug)
         
         return fit_land
     
@@ -757,11 +966,11 @@ class Population(PopParams):
         return u
     
     def gen_on_off(self,duty_cycle=None):
-        u = pharm.gen_on_off(self,duty_cycle=duty_cycle)
+        u = pharm.gen_on_off_regimen(self,duty_cycle=duty_cycle)
         return u
     
-    def gen_curves(self):
-        curve, u = pharm.gen_curves(self)
+    def gen_curves(self,out_curve=None,out_u=None):
+        curve, u = pharm.gen_curves(self,out_curve=out_curve,out_u=out_u)
         return curve, u
     
     def gen_passage_drug_protocol(self):
@@ -770,10 +979,23 @@ class Population(PopParams):
 
     def set_drug_curve(self):
         """Sets the drug concentration curve for a given population
+
+        gen_curves works in a private float64 scratch array that is reused 
+        between calls. drug_curve and impulses are always new float32 arrays, 
+        which is ample precision for drug concentrations and halves their 
+        memory traffic, so curves kept from earlier calls are never overwritten.
         """
-        dc = self.gen_curves()
-        self.drug_curve = dc[0]
-        self.impulses = dc[1]
+        buf = getattr(self,'_curve_buf',None)
+        if buf is None or buf.shape != (self.n_timestep,):
+            buf = np.empty(self.n_timestep)
+            self._curve_buf = buf
+
+        curve, u = self.gen_curves(out_curve=buf)
+        self.drug_curve = np.array(curve,dtype=np.float32)
+        if u is None:
+            self.impulses = None
+        else:
+            self.impulses = np.array(u,dtype=np.float32)
 
     ###########################################################################
     # Misc helper methods
@@ -784,13 +1006,71 @@ class Population(PopParams):
            Useful when performing experiments with a large number of population objects. 
            Eliminates the need to repeatedly estimate fitness seascapes.
         """
-        for paramkey in self.__dict__.keys():
-            for optkey in kwargs.keys():
-                if paramkey == optkey:
-                    td = {paramkey:kwargs.get(paramkey)}
-                    self.__dict__.update(td)
+        attrs = self.__dict__
+        for key, value in kwargs.items():
+            if key in attrs:
+                attrs[key] = value
         
         self.set_drug_curve()
+
+    def __copy__(self):
+        """Shallow copy of the population.
+
+        Fitness and pharmacological data (ic50, drugless_rates, drug libraries) 
+        are shared with the original by reference. Per-simulation state (counts, 
+        drug_curve, impulses and the drug curve dicts) is owned by the copy.
+        """
+        p = self.__class__.__new__(self.__class__)
+        p.__dict__.update(self.__dict__)
+
+        p.counts = np.zeros_like(self.counts)
+        if isinstance(self.drug_curve,np.ndarray):
+            p.drug_curve = self.drug_curve.copy()
+        if isinstance(self.impulses,np.ndarray):
+            p.impulses = self.impulses.copy()
+        if self.drug_curve_dict is not None:
+            p.drug_curve_dict = dict(self.drug_curve_dict)
+        if self.drug_impulse_dict is not None:
+            p.drug_impulse_dict = dict(self.drug_impulse_dict)
+
+        return p
+
+    def clone_with(self,**kwargs):
+        """Returns a copy of the population with the parameters in kwargs updated 
+           and the drug concentration curve reset.
+
+           Useful for building many populations that only differ in their drug 
+           concentration curves. See reset_drug_conc_curve.
+        """
+        p = copy.copy(self)
+        p.reset_drug_conc_curve(**kwargs)
+        return p
+
+    def sweep(self,param_name,values,n_workers=None):
+        """Computes the drug concentration curve for each value of a parameter.
+
+        Each value is applied to a copy of the population (see clone_with), so 
+        the population itself is left unchanged.
+
+        Args:
+            param_name (str): Name of the parameter to sweep, e.g. 'k_abs'.
+            values (iterable): Parameter values.
+            n_workers (int, optional): Number of worker processes. Defaults to 
+                self.n_workers. The sweep runs serially if None or 1.
+
+        Returns:
+            list: drug concentration curve for each parameter value
+        """
+        if n_workers is None:
+            n_workers = self.n_workers
+
+        args = [(self,param_name,v) for v in values]
+
+        if n_workers is None or n_workers <= 1 or len(args) <= 1:
+            return [_sweep_worker(a) for a in args]
+        
+        with ProcessPoolExecutor(n_workers) as ex:
+            return list(ex.map(_sweep_worker,args))
     
     def set_null_seascape(self,conc,method='curve_fit'):
 
@@ -800,40 +1080,34 @@ class Population(PopParams):
 
     def print_params(self):
 
-        print('Biological parameters:',end='\n')
-        print(' * Mutation rate: ',self.mut_rate,end='\n')
-        print(' * Death rate: ',self.death_rate,end='\n')
+        lines = ['Biological parameters:',
+                 f' * Mutation rate:  {self.mut_rate}',
+                 f' * Death rate:  {self.death_rate}']
 
-        ic50 = [round(i,3) for i in self.ic50]
+        ic50 = np.round(self.ic50,3)
 
-        print(' * IC50: ',end='\n')
-        for g in range(len(ic50)):
-            print('    ',g,': ',ic50[g],end='\n')
+        lines.append(' * IC50: ')
+        lines.extend(f'     {g} :  {v}' for g,v in enumerate(ic50.tolist()))
 
-        print(' * Drugless growth rates: ',end='\n')
-        dr = self.drugless_rates
-        for g in range(len(dr)):
-            print('    ',g,': ',dr[g],end='\n')
+        lines.append(' * Drugless growth rates: ')
+        lines.extend(f'     {g} :  {v}' for g,v in enumerate(self.drugless_rates))
 
-        print('Pharmacoligical parameters:',end='\n')
-        print(' * Curve type: ',self.curve_type,end='\n')
-        print(' * Max concentration: ',self.max_dose,end='\n')
+        lines += ['Pharmacoligical parameters:',
+                  f' * Curve type:  {self.curve_type}',
+                  f' * Max concentration:  {self.max_dose}']
         
         if self.curve_type == 'pharm' or self.curve_type == 'pulsed':
-            print(' * k_elim: ',self.k_elim,end='\n')
-            print(' * k_abs: ',self.k_abs,end='\n')
+            lines += [f' * k_elim:  {self.k_elim}',
+                      f' * k_abs:  {self.k_abs}']
 
-        print('Experimental parameters:',end='\n')
-        print(' * N simulations: ',self.n_sims,end='\n')
-        print(' * Use carrying capacity? ',self.use_carrying_cap,end='\n')
+        lines += ['Experimental parameters:',
+                  f' * N simulations:  {self.n_sims}',
+                  f' * Use carrying capacity?  {self.use_carrying_cap}']
         if self.use_carrying_cap:
-            print(' * Carrying capacity: ',self.carrying_cap,end='\n')
+            lines.append(f' * Carrying capacity:  {self.carrying_cap}')
 
-        print('Data information:',end='\n')
-        print(' * Fitness data: ',self.fitness_data,end='\n')
-        print(' * Data source: ',self.data_source,end='\n')
-    
-    ###########################################################################
-    # Set wrapper method docs
+        lines += ['Data information:',
+                  f' * Fitness data:  {self.fitness_data}',
+                  f' * Data source:  {self.data_source}']
 
-    gen_fit_land.__doc__ = fitness.gen_fit_land.__doc__
\ No newline at end of file
+        print('\n'.join(lines))
\ No newline at end of file
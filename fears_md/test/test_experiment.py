@@ -1,2 +1,51 @@
+import sys
+import importlib.util
 import pytest
+import numpy as np
+from types import ModuleType, SimpleNamespace
+import fears_md.utils
 
+# experiment imports stats, whose results_manager dependency is not part of 
+# this package. None of it is used here, so stand in an empty module.
+if importlib.util.find_spec('fears_md.utils.results_manager') is None:
+    results_manager = ModuleType('fears_md.utils.results_manager')
+    sys.modules['fears_md.utils.results_manager'] = results_manager
+    fears_md.utils.results_manager = results_manager
+
+from fears_md import experiment
+
+def ramp_ud_loop(e,n_timestep):
+    # reference implementation: the original per-timestep loop
+    drug_curve = np.zeros(n_timestep)
+    slope = (e.second_dose-e.first_dose)/e.ramp
+    buffer = e.ramp/2
+    times = [e.transition_times[0]-buffer,
+             e.transition_times[0]+buffer,
+             e.transition_times[1]-buffer,
+             e.transition_times[1]+buffer]
+    for t in range(n_timestep):
+        if t<times[0]:
+            drug_curve[t] = e.first_dose
+        elif t<times[1]:
+            drug_curve[t] = drug_curve[t-1]+slope
+        elif t<times[2]:
+            drug_curve[t] = e.second_dose
+        elif (t<times[3] and 
+              drug_curve[t-1]+slope<e.third_dose):
+            drug_curve[t] = drug_curve[t-1]+slope
+        else:
+            drug_curve[t] = e.third_dose
+    return drug_curve
+
+@pytest.mark.parametrize('doses',[(0.01,100,10),    # ramp up
+                                  (200,100,50),     # ramp down
+                                  (10,100,1000),    # never reaches third dose
+                                  (100,100,10)])    # flat
+@pytest.mark.parametrize('ramp',[1,7,10])
+def test_set_ramp_ud(doses,ramp):
+    e = SimpleNamespace(first_dose=doses[0],second_dose=doses[1],
+                        third_dose=doses[2],ramp=ramp,transition_times=[10,30])
+    p = SimpleNamespace(n_timestep=50)
+    dc = experiment.Experiment.set_ramp_ud(e,p)
+    assert np.allclose(dc,ramp_ud_loop(e,50))
+    assert p.drug_curve is dc
@@ -0,0 +1,28 @@
+import pytest
+import numpy as np
+from scipy.optimize import curve_fit
+from fears_md.utils.fitness import (logistic_equation, logistic_jacobian, 
+                                    fit_logistic_curve)
+
+def test_logistic_jacobian():
+    conc = np.array([10**-3,0.7,10**5])
+    p = np.array([1.2,0.5,-0.8])
+    h = 10**-6
+    num = np.array([(logistic_equation(conc,*(p+d)) - 
+                     logistic_equation(conc,*(p-d)))/(2*h) 
+                    for d in np.eye(3)*h]).T
+    assert np.allclose(logistic_jacobian(conc,*p),num,rtol=10**-5,atol=10**-8)
+
+def test_fit_logistic_curve():
+    # fits all three parameters, like curve_fit, and is never a worse fit
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        xdata = np.array([10**-3,10**rng.uniform(-2,3),10**5])
+        ydata = logistic_equation(xdata,rng.uniform(1,1.5),rng.uniform(-3,3),
+                                  rng.uniform(-1.5,-0.3))*rng.uniform(0.7,1.3,3)
+        popt = fit_logistic_curve(xdata,ydata)
+        popt_cf,pcov = curve_fit(logistic_equation,xdata,ydata)
+        assert len(popt) == 3
+        res = np.sum((logistic_equation(xdata,*popt) - ydata)**2)
+        res_cf = np.sum((logistic_equation(xdata,*popt_cf) - ydata)**2)
+        assert res <= res_cf*(1+10**-6) + 10**-12
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from fears_md.utils.pharm import *
 from fears_md.population import Population, PopParams
 
@@ -40,8 +41,12 @@ def test_get_impulses2(pop):
     bools = [i ==0 or i ==1 for i in imp]
     assert all(bools)
 
-#def test_gen_on_off(pop):
-#    v = gen_on_off_regimen(pop)
+def test_gen_on_off(pop):
+    v = gen_on_off_regimen(pop,duty_cycle=0.5)
+    assert len(v) == pop.n_timestep
+    assert all(v[0:12] == pop.max_dose)
+    assert all(v[12:24] == 0)
+    assert v[24] == pop.max_dose
 
 def test_gen_curves(pop):
     c = gen_curves(pop)
@@ -50,4 +55,13 @@ def test_gen_curves(pop):
 
 def test_gen_passage_drug(pop):
     p = gen_passage_drug_protocol(pop)
-    assert len(p) == pop.n_timestep
\ No newline at end of file
+    assert len(p) == pop.n_timestep
+
+
+def test_convolve_pharm_sparse(pop):
+    drug = pop.drug_list[0]
+    u = np.zeros(pop.n_timestep)
+    u[[0,24,48,300]] = 1
+    kernel = drug_pk_kernel(pop,drug)
+    p = convolve_pharm_sparse(pop,np.flatnonzero(u),u[u>0],drug)
+    assert np.allclose(p,np.convolve(u,kernel)[:pop.n_timestep])
@@ -1,4 +1,5 @@
-from fears_md.population import Population, PopParams
+import numpy as np
+from fears_md.population import Population, PopParams, _hamming_neighbors
 import pytest
 
 @pytest.fixture
@@ -32,4 +33,79 @@ def test_estimated_data(pop_random_data):
     assert pop_random_data.n_allele == 2
     assert pop_random_data.n_genotype == 4
     assert len(pop_random_data.ic50) == 4
-    assert len(pop_random_data.drugless_rates) == 4
\ No newline at end of file
+    assert len(pop_random_data.drugless_rates) == 4
+
+def test_random_mutations(default_pop):
+    P = default_pop.random_mutations(16)
+    assert np.allclose(P.sum(axis=0), 1)
+    # genotype 0 can only mutate to its single-bit neighbors
+    assert set(np.flatnonzero(P[:,0])) == {1,2,4,8}
+
+def test_hamming_neighbors(default_pop):
+    neighbors = _hamming_neighbors(16)
+    P = default_pop.random_mutations(16)
+    for g in range(16):
+        assert set(neighbors[g]) == set(np.flatnonzero(P[:,g]))
+
+def test_passage_cells():
+    p = Population(passage=True,passage_time=24,dilution=40)
+    counts = np.array([1000,39,41,0])
+    assert np.array_equal(p.passage_cells(24,counts),[25,0,1,0])
+    # no passage at other timesteps
+    assert np.array_equal(p.passage_cells(25,counts),counts)
+
+def test_hamming_distance(default_pop):
+    assert default_pop.hamming_distance(0,0) == 0
+    assert default_pop.hamming_distance(0b0101,0b0110) == 2
+    assert default_pop.hamming_distance(0,15) == 4
+
+def test_check_stop_cond(default_pop):
+    assert default_pop.check_stop_cond(np.array([5,0,0,0]),1,
+                                       fittest_genotype=3) == False
+    assert default_pop.check_stop_cond(np.array([5,0,0,6]),1,
+                                       fittest_genotype=3) == True
+    assert default_pop.check_stop_cond(np.array([0,0,0,0]),1,
+                                       fittest_genotype=0) == True
+
+def test_sweep():
+    p = Population(curve_type='constant',max_dose=1)
+    doses = [10,100]
+    curves = p.sweep('max_dose',doses)
+    for dose, dc in zip(doses,curves):
+        assert np.allclose(dc,dose)
+    # the population itself is unchanged
+    assert p.max_dose == 1
+    # parallel sweep gives the same curves
+    par = p.sweep('max_dose',doses,n_workers=2)
+    assert all(np.array_equal(a,b) for a, b in zip(curves,par))
+
+def test_pd_params(default_pop):
+    lib = default_pop.pd_library
+    for drug, params in default_pop.pd_params.items():
+        assert params.shape == (default_pop.n_genotype,4)
+        assert params.flags['C_CONTIGUOUS']
+        for g in range(default_pop.n_genotype):
+            row = lib[(lib['drug']==drug) & (lib['genotype']==g)]
+            assert np.array_equal(params[g],
+                                  row[['gmax','gmin','ic50','hc']].values[0])
+
+def test_reset_drug_conc_curve_returns_new_curve():
+    p = Population(curve_type='constant',max_dose=1)
+    curves = []
+    for dose in [1,10,100]:
+        p.reset_drug_conc_curve(max_dose=dose)
+        curves.append(p.drug_curve)
+    # earlier curves are not overwritten by later resets
+    for dose, dc in zip([1,10,100],curves):
+        assert np.allclose(dc,dose)
+
+def test_run_abm_stop_condition():
+    p = Population(stop_condition=True,death_model='pharmacodynamic',
+                   max_dose=1,mut_rate=0.01,n_timestep=1000,seed=0)
+    p.drug_curve_dict = {drug:np.ones(p.n_timestep) 
+                         for drug in p.drug_curve_dict}
+    # genotype 1 is fittest under the minimum over both drugs
+    assert p.get_fittest_genotype() == 1
+    counts, mm = p.run_abm()
+    assert counts.shape[0] == mm + 1
+    assert counts[-1].argmax() == 1
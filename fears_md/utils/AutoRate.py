@@ -1082,7 +1082,7 @@ class Plate():
 
         genotype_dict = {}
 
-        for g in np.arange(cur_max+1):
+        for g in range(cur_max+1):
 
             # generate a list of tuples that are row-col pairs
             if data_type == int:
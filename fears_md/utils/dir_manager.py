@@ -3,6 +3,7 @@ import os
 import pandas as pd
 import numpy as np
 import pickle
+import functools
 
 def get_project_root() -> Path:
     return Path(__file__).parent.parent
@@ -52,6 +53,20 @@ def load_growth_rate_data(data_path):
     
     return data
 
+@functools.lru_cache(maxsize=None)
+def _read_excel_cached(path,mtime):
+    return pd.read_excel(path)
+
+def load_drug_library(data_path):
+    """Loads a pharmacokinetic or pharmacodynamic library from an excel file.
+
+    Parsing excel files is slow, so each file is only parsed once per process 
+    (and again if it is modified). Callers get their own copy of the table.
+    """
+    data_path = str(data_path)
+    data = _read_excel_cached(data_path,os.path.getmtime(data_path))
+    return data.copy()
+
 def load_experiment(exp_path):
     e = pickle.load(exp_path)
     return e
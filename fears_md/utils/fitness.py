@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.optimize import curve_fit
+from scipy.optimize import least_squares
 import matplotlib.pyplot as plt
 # from fears.population import Population
 
@@ -106,17 +106,7 @@ def gen_fitness(pop,genotype,conc,drug):
         float: fitness
     """
 
-    drug_df = pop.pd_library[pop.pd_library['drug']==drug]
-    drug_df = drug_df[drug_df['genotype']==genotype]
-    # print(drug_df['gmax'].keys())
-    # gmax = drug_df['gmax'][genotype]
-    # gmin = drug_df['gmin'][genotype]
-    # ic50 = drug_df['ic50'][genotype]
-    # hc = drug_df['hc'][genotype]
-    gmax = drug_df['gmax'].values[0]
-    gmin = drug_df['gmin'].values[0]
-    ic50 = drug_df['ic50'].values[0]
-    hc = drug_df['hc'].values[0]
+    gmax,gmin,ic50,hc = pop.pd_params[drug][genotype]
 
     return pharmacodynamic_curve(conc,gmax,gmin,ic50,hc)
 
@@ -136,18 +126,17 @@ def gen_abm_fl_md(pop,mm,counts):
     # then, for each genotype, get the lowest fitness value.
     # finally, scale by carrying capacity
 
-    # get the first fitness landscape to compare the others against
+    # drug concentrations at this timestep, one per row of drug_curve_mat
+    dc = pop.drug_curve_mat[:,mm]
 
-    drug = pop.drug_list[0]
+    fit_land = None
 
-    dc = pop.drug_curve_dict[drug][mm]
-
-    fit_land = gen_fit_land(pop,dc,drug)
-
-    for d in pop.drug_list[1:]:
-        dc = pop.drug_curve_dict[d][mm]
-        fit_land_d = gen_fit_land(pop,dc,d)
-        fit_land = np.minimum(fit_land,fit_land_d)
+    for d,i in pop.drug_idx.items():
+        fit_land_d = gen_fit_land(pop,dc[i],d)
+        if fit_land is None:
+            fit_land = fit_land_d
+        else:
+            fit_land = np.minimum(fit_land,fit_land_d)
 
     pos_indx = np.argwhere(fit_land>0)
     
@@ -274,18 +263,20 @@ def gen_fit_land(pop,conc,drug):
     Args:
         pop (population class object): Population object
         conc (float): drug concentration
-        counts (array-like): list of population counts
+        drug (str): drug name
 
     Returns:
-        list: lits of growth rates
+        np.ndarray: growth rates per genotype
     """
 
-    fit_land = np.zeros(pop.n_genotype)
-            
-    for gen in range(pop.n_genotype):
-        fit_land[gen] = gen_fitness(pop,gen,conc,drug)
+    # one row of (gmax, gmin, ic50, hc) per genotype
+    params = pop.pd_params[drug]
+
+    fit_land = pharmacodynamic_curve(conc,params[:,0],params[:,1],
+                                     params[:,2],params[:,3])
     
-    return fit_land
+    # copy, since at zero concentration this is the gmax column itself
+    return np.array(fit_land,dtype=float)
 
 # Generate fitness landscape for use in the abm method
 def gen_fl_for_abm(pop,conc,counts):
@@ -352,11 +343,68 @@ def gen_random_seascape(pop,
     
     return drugless_rates,ic50
 
+def logistic_jacobian(conc,drugless_rate,ic50,hc=-0.6824968):
+    """Jacobian of logistic_equation with respect to (drugless_rate, ic50, hc).
+
+    Returns
+    -------
+    jac : numpy array
+        Array of shape (len(conc), 3).
+    """
+    x = ic50-np.log10(conc)
+    # s is the logistic term, written so it stays finite when exp overflows
+    s = 1/(1+np.exp(x/hc))
+    ds = drugless_rate*s*(1-s)
+    jac = np.empty((len(s),3))
+    jac[:,0] = s
+    jac[:,1] = -ds/hc
+    jac[:,2] = ds*x/hc**2
+    return jac
+
 def fit_logistic_curve(xdata,ydata):
+    """Fits logistic_equation to (xdata, ydata).
+
+    Like curve_fit, all three parameters (drugless_rate, ic50 and hc) are 
+    fit with Levenberg-Marquardt starting from ones. The analytic Jacobian is 
+    used, so no extra function evaluations are spent on finite differences.
+
+    Returns
+    -------
+    popt : numpy array
+        Fitted drugless_rate, ic50 and hc.
+    """
+    xdata = np.asarray(xdata,dtype=float)
+    ydata = np.asarray(ydata,dtype=float)
+
+    res = least_squares(lambda p: logistic_equation(xdata,*p) - ydata,
+                        x0=[1,1,1],
+                        jac=lambda p: logistic_jacobian(xdata,*p),
+                        method='lm')
     
-    popt,var = curve_fit(logistic_equation,xdata,ydata)
+    return res.x
+
+def fit_logistic_curves(xdata,ydata):
+    """Fits logistic_equation to each row of ydata.
+
+    All curves share xdata, which is converted once. Each curve is fit 
+    separately with fit_logistic_curve, so every fit converges on its own.
+
+    Args:
+        xdata (array-like): drug concentrations shared by all curves.
+        ydata (array-like): array of shape (n_curves, len(xdata)).
+
+    Returns:
+        numpy array: array of shape (n_curves, 3) with the fitted 
+            drugless_rate, ic50 and hc of each curve.
+    """
+    xdata = np.asarray(xdata,dtype=float)
+    ydata = np.atleast_2d(np.asarray(ydata,dtype=float))
+
+    params = np.empty((ydata.shape[0],3))
+    for i,y in enumerate(ydata):
+        params[i] = fit_logistic_curve(xdata,y)
     
-    return popt
+    return params
 
 def gen_null_seascape(pop,conc,method='curve_fit'):
     """Generates a 'null seascape'.
@@ -397,23 +445,13 @@ def gen_null_seascape(pop,conc,method='curve_fit'):
         mid_points = landscape
         
         xdata = [10**-3,conc,10**5]
-        
-        ic50_new = []
-        drugless_rates_new = []
-
-        # fig,ax = plt.subplots()
-        
-        for genotype in range(len(landscape)):
 
-            ydata = [start_points[genotype],
-                    mid_points[genotype],
-                    end_points[genotype]]
-            
-            # ax.scatter(xdata,ydata,label=str(genotype))
+        # one row of (start, mid, end) points per genotype
+        ydata = np.column_stack([start_points,mid_points,end_points])
 
-            params = fit_logistic_curve(xdata,ydata)
-            ic50_new.append(params[1])
-            drugless_rates_new.append(params[0])
+        params = fit_logistic_curves(xdata,ydata)
+        ic50_new = list(params[:,1])
+        drugless_rates_new = list(params[:,0])
         # find the null landscape drugless rates
         # ax.set_xscale('log')
         # ax.legend()
@@ -1,4 +1,6 @@
 import numpy as np
+import functools
+from scipy.fft import next_fast_len
 
 # Methods for generating drug curves
 
@@ -22,17 +24,100 @@ def pharm_eqn(pop,t,k_elim,k_abs,c_max):
 
     k_elim = k_elim*pop.timestep_scale
     k_abs = k_abs*pop.timestep_scale
-    
+
+    return _pharm_eqn_scaled(t,k_elim,k_abs,c_max)
+
+def _pharm_eqn_scaled(t,k_elim,k_abs,c_max):
+    """pharm_eqn with k_elim and k_abs already scaled to units of timesteps.
+
+    The scalar normalization is folded into one factor and intermediate 
+    arrays are updated in place to limit temporaries of the size of t.
+    """
     if k_elim == 0:
         conc = 1 - np.exp(-k_abs*t)
-        conc = conc*c_max
+        conc *= c_max
     else:
-        conc = np.exp(-k_elim*t)-np.exp(-k_abs*t) 
         t_max = np.log(k_elim/k_abs)/(k_elim-k_abs)
-        conc = conc/(np.exp(-k_elim*t_max)-np.exp(-k_abs*t_max))
-        conc = conc*c_max
+        scale = c_max/(np.exp(-k_elim*t_max)-np.exp(-k_abs*t_max))
+        conc = np.exp(-k_elim*t)
+        conc -= np.exp(-k_abs*t)
+        conc *= scale
     return conc
 
+@functools.lru_cache(maxsize=64)
+def _pk_kernel(n_timestep,k_elim,k_abs,c_max):
+    """Pharmacokinetic curve of a single dose, cached on its parameters.
+
+    k_elim and k_abs are in units of timesteps. The array is shared between 
+    calls, so it is returned read-only.
+    """
+    t = np.arange(n_timestep)
+    kernel = np.ascontiguousarray(_pharm_eqn_scaled(t,k_elim,k_abs,c_max),
+                                  dtype=np.float64)
+    kernel.flags.writeable = False
+    return kernel
+
+@functools.lru_cache(maxsize=64)
+def _pk_kernel_rfft(n_timestep,k_elim,k_abs,c_max,nfft):
+    """Real FFT of _pk_kernel zero-padded to nfft, cached like the kernel."""
+    kernel_fft = np.fft.rfft(_pk_kernel(n_timestep,k_elim,k_abs,c_max),n=nfft)
+    kernel_fft.flags.writeable = False
+    return kernel_fft
+
+def drug_pk_kernel(pop,drug):
+    """Pharmacokinetic curve of a single dose of drug, from pop.pk_library.
+
+    Args:
+        pop (population): Population class object
+        drug (str): drug name
+
+    Returns:
+        numpy array: read-only drug concentration curve of length pop.n_timestep
+    """
+    return _pk_kernel(*_pk_kernel_key(pop,drug))
+
+def _pk_kernel_key(pop,drug):
+    """Parameters that determine the pharmacokinetic kernel of drug."""
+    pk_df = pop.pk_library[pop.pk_library['drug']==drug]
+    k_elim = pk_df['k_elim'].values[0]
+    k_abs = pk_df['k_abs'].values[0]
+    c_max = pk_df['c_max'].values[0]
+    
+    # the kernel only depends on these, so it is reused across parameter sweeps
+    return (int(pop.n_timestep),
+            float(k_elim*pop.timestep_scale),
+            float(k_abs*pop.timestep_scale),
+            float(c_max))
+
+# Below this many doses convolve_pharm superposes shifted kernels directly
+MAX_SPARSE_SPIKES = 50
+
+def convolve_pharm_sparse(pop,spike_idx,spike_mag,drug):
+    """Drug concentration for a dose regimen given as a list of doses.
+
+    Equivalent to convolving an impulse train with the 1-compartment 
+    pharmacokinetic model, but computed as a sum of shifted single-dose curves. 
+    This costs O(n_dose*T) instead of O(T log T), so it is faster when there 
+    are only a few doses.
+
+    Args:
+        pop (population): Population class object
+        spike_idx (array-like): timesteps at which doses are administered.
+        spike_mag (array-like): size of each dose (1 for a standard dose).
+        drug (str): drug name
+
+    Returns:
+        numpy array: drug concentration curve of length pop.n_timestep
+    """
+    kernel = drug_pk_kernel(pop,drug)
+    n = len(kernel)
+
+    conv = np.zeros(n)
+    for i,m in zip(spike_idx,spike_mag):
+        if i < n:
+            conv[i:] += m*kernel[:n-i]
+    return conv
+
 # Convolve dose regimen u with pharmacokinetic model
 def convolve_pharm(pop,u,drug):
                    # k_elim=0.01,
@@ -40,7 +125,11 @@ def convolve_pharm(pop,u,drug):
                    # max_dose=1):
     """Models serum drug concentration of a patient undergoing a drug regimen.
 
-    Convolves an impulse train (u) with a 1-compartment pharmacokinetic model.
+    Convolves an impulse train (u) with a 1-compartment pharmacokinetic model. 
+    Long signals are convolved with real FFTs, O(T log T) in the number of 
+    timesteps rather than O(T^2), reusing the cached FFT of the kernel. Short 
+    signals use direct convolution, which is faster below a few hundred 
+    timesteps.
 
     Args:
         pop (population): Population class object
@@ -50,17 +139,25 @@ def convolve_pharm(pop,u,drug):
     Returns:
         numpy array: result of convolution
     """
-    pk_df = pop.pk_library[pop.pk_library['drug']==drug]
-    k_elim = pk_df['k_elim'].values[0]
-    k_abs = pk_df['k_abs'].values[0]
-    c_max = pk_df['c_max'].values[0]
-    
-    pharm = np.zeros(pop.n_timestep)
-    for i in range(pop.n_timestep):
-        pharm[i] = pop.pharm_eqn(i,k_elim=k_elim,k_abs=k_abs,c_max=c_max)
+    u = np.asarray(u,dtype=float)
+
+    # dosing schedules are usually a handful of spikes, which are cheaper to 
+    # superpose directly than to convolve
+    spike_idx = np.flatnonzero(u)
+    if len(spike_idx) <= MAX_SPARSE_SPIKES:
+        return convolve_pharm_sparse(pop,spike_idx,u[spike_idx],drug)
+
+    key = _pk_kernel_key(pop,drug)
     
-    conv = np.convolve(u,pharm)
+    if pop.n_timestep > 512:
+        nfft = next_fast_len(len(u) + pop.n_timestep - 1,real=True)
+        conv = np.fft.irfft(np.fft.rfft(u,n=nfft)*_pk_kernel_rfft(*key,nfft),
+                            n=nfft)
+    else:
+        conv = np.convolve(u,_pk_kernel(*key))
     conv = conv[0:pop.n_timestep]
+    # FFT round-off can leave tiny negative concentrations where u is zero
+    conv = np.maximum(conv,0)
     return conv
 
 # Generates an impulse train to input to convolve_pharm()
@@ -76,9 +173,6 @@ def gen_impulses(pop):
         numpy array: impulse train
     """
     u = np.zeros(pop.n_timestep)
-    impulse_indx = [0]
-    
-    i = 0
     
     # generate the drug dose regimen
 
@@ -95,11 +189,13 @@ def gen_impulses(pop):
     if regimen_length > pop.n_timestep:
         regimen_length = pop.n_timestep
 
-    while impulse_indx[i] < regimen_length*pop.timestep_scale-pop.dose_schedule:
-        impulse_indx.append(pop.dose_schedule*(i+1))
-        i+=1
+    # doses every dose_schedule hours, up to and including the first dose at or 
+    # after regimen_length*timestep_scale - dose_schedule
+    last_dose = regimen_length*pop.timestep_scale - pop.dose_schedule
+    n_dose = max(int(np.ceil(last_dose/pop.dose_schedule)),0) + 1
+    impulse_indx = np.arange(n_dose)*pop.dose_schedule
     
-    impulse_indx = np.array(impulse_indx)/pop.timestep_scale
+    impulse_indx = impulse_indx/pop.timestep_scale
     
     # eliminate random doses
     keep_indx = np.random.rand(len(impulse_indx)) > pop.prob_drop
@@ -124,26 +220,36 @@ def gen_on_off_regimen(pop,duty_cycle=None):
     if duty_cycle is None:
         duty_cycle = 0.5
         
+    t = np.arange(pop.n_timestep)
+    on_time = round((pop.dose_schedule*duty_cycle))/pop.timestep_scale
+
+    # drug is switched on at multiples of the dose period...
+    dose_start = np.where(np.mod(t,pop.dose_schedule/pop.timestep_scale) == 0,
+                          t,-1)
+    last_start = np.maximum.accumulate(dose_start)
+    on = last_start >= 0
+    # ...and off on_time timesteps later, if that lands on a timestep
+    if on_time == int(on_time):
+        on &= (t - last_start) < on_time
+
     u = np.zeros(pop.n_timestep)
-    on = False
-    for i in range(pop.n_timestep):
-        if np.mod(i,pop.dose_schedule/pop.timestep_scale) == 0:
-            on = True
-            off_time = i + round((pop.dose_schedule*duty_cycle))/pop.timestep_scale
-        if i == off_time:
-            on = False
-        if on:
-            u[i] = pop.max_dose
+    u[on] = pop.max_dose
     return u
 
 # generates drug concentration curves
-def gen_curves(pop):
+def gen_curves(pop,out_curve=None,out_u=None):
     """General method for generating drug concentration curves for populations
 
     Generates drug concentration curves based on parameters in population object
 
     Args:
         pop (population): Population class object
+        out_curve (numpy array, optional): Array to write the drug concentration 
+            curve into. Only used if it has the same shape as the curve. 
+            Defaults to None.
+        out_u (numpy array, optional): Array to write the impulse train into. 
+            Only used if it has the same shape as the impulse train. Defaults 
+            to None.
 
     Returns:
         list of numpy arrays: Drug concentration curve and impulse train
@@ -152,7 +258,11 @@ def gen_curves(pop):
         dwell_indx = int(pop.dwell_time/pop.timestep_scale)
     else:
         dwell_indx = 0
-    curve = np.zeros(pop.n_timestep)
+    if _fits(out_curve,(pop.n_timestep,)):
+        curve = out_curve
+        curve[:] = 0
+    else:
+        curve = np.zeros(pop.n_timestep)
     u = None
     if pop.curve_type == 'linear': # aka ramp linearly till timestep defined by steepness
         # cur_dose = 0
@@ -202,10 +312,22 @@ def gen_curves(pop):
         curve = pop.convolve_pharm(u)
         
     elif pop.curve_type == 'on_off':
-        curve = pop.gen_on_off_regimen()
+        curve = pop.gen_on_off()
+
+    if curve is not out_curve and _fits(out_curve,np.shape(curve)):
+        np.copyto(out_curve,curve)
+        curve = out_curve
+    if u is not None and _fits(out_u,np.shape(u)):
+        np.copyto(out_u,u)
+        u = out_u
         
     return curve, u
 
+def _fits(out,shape):
+    """True if out is a writeable float array of the given shape."""
+    return (isinstance(out,np.ndarray) and out.shape == tuple(shape) 
+            and out.dtype.kind == 'f' and out.flags.writeable)
+
 def gen_passage_drug_protocol(pop):
     """Generated drug dose over time when simulating cell passaging
 
@@ -1,7 +1,6 @@
 # import sys
 import matplotlib.pyplot as plt
 from cycler import cycler
-import seaborn as sns
 import numpy as np
 # import os
 import math
@@ -9,8 +8,6 @@ import scipy.stats
 from fears_md.utils import fitness
 from matplotlib.collections import LineCollection
 from matplotlib.patches import Polygon
-import networkx as nx
-from labellines import labelLine
 
 
 def gen_color_cycler(style=None,palette='bright',n_colors=16):
@@ -25,6 +22,8 @@ def gen_color_cycler(style=None,palette='bright',n_colors=16):
     Returns:
         cycler: Matplotlib cycle object
     """
+    # seaborn takes a while to import, so only load it when plotting
+    import seaborn as sns
     
     if style is None:
         colors = sns.color_palette(palette)
@@ -531,6 +530,9 @@ def plot_timecourse_to_axes(pop,
     # counts_ax.zorder = 10
     
     if label_lines:
+        # optional dependency (matplotlib-label-lines), see setup.py
+        from labellines import labelLine
+
         lines = counts_ax.get_lines()
         
         for i in range(len(label_xpos)):
@@ -617,6 +619,8 @@ def plot_landscape(p,conc=10**0,
     for g in genotypes: hierarchy[g[0].count("1")].append(g)
 
     # Add all unique bit sequences as nodes to the graph
+    # networkx is an optional dependency, see setup.py
+    import networkx as nx
     G = nx.DiGraph()
     G.add_nodes_from(genotypes)
 
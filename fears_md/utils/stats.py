@@ -2,24 +2,31 @@ import os
 import numpy as np
 from fears_md.utils import results_manager
 import pickle
-import lifelines
 import scipy.stats as stats
 
-def survival_proportion(pop,data):
+def survival_proportion(pop,data,presummed=False):
     """Computes survival fraction of populations in an experiment for lhs analysis 
 
     Args:
         pop (population): Population class object
         data (list): list of population size counts over time
+        presummed (bool, optional): if true, data is a list of equal-length total 
+            population size traces and survival is computed for all of them at 
+            once. Defaults to False.
 
     Returns:
         float: proportion of simulations that survived
     """
-    n_survived = 0
-    for c in data:
-        obs,time = extinction_time(pop,c,thresh=1)
-        if obs == 0:
-            n_survived += 1
+    if presummed:
+        # survived if the population never drops to 1 cell or fewer
+        data = np.asarray(data)
+        n_survived = np.count_nonzero(np.all(data > 1,axis=1))
+    else:
+        n_survived = 0
+        for c in data:
+            obs,time = extinction_time(pop,c,thresh=1)
+            if obs == 0:
+                n_survived += 1
     
     p_survived = n_survived/len(data)
 
@@ -423,6 +430,43 @@ def gen_neighbors(pop,genotype):
 
     return neighbors
 
+def first_below(c,thresh,inclusive=False,chunk=1024):
+    """Returns the index of the first element of c below thresh, or -1.
+
+    c is scanned in chunks so the search stops at the first crossing rather 
+    than comparing the whole array.
+
+    Args:
+        c (array-like): 1D trace, e.g. total population size over time
+        thresh (float): threshold
+        inclusive (bool, optional): if true, elements equal to thresh also 
+            count as below it. Defaults to False.
+        chunk (int, optional): number of elements compared at a time. 
+            Defaults to 1024.
+
+    Returns:
+        int: index of the first crossing, or -1 if c never crosses thresh
+    """
+    for start in range(0,len(c),chunk):
+        if inclusive:
+            indx = np.flatnonzero(c[start:start+chunk] <= thresh)
+        else:
+            indx = np.flatnonzero(c[start:start+chunk] < thresh)
+        if len(indx) > 0:
+            return start + int(indx[0])
+    return -1
+
+def first_above(c,thresh,chunk=1024):
+    """Returns the index of the first element of c above thresh, or -1.
+
+    See first_below.
+    """
+    for start in range(0,len(c),chunk):
+        indx = np.flatnonzero(c[start:start+chunk] > thresh)
+        if len(indx) > 0:
+            return start + int(indx[0])
+    return -1
+
 def extinction_time(pop,counts,thresh=0):
     
     if len(counts.shape) > 1:
@@ -430,13 +474,13 @@ def extinction_time(pop,counts,thresh=0):
     else:
         c = counts
 
-    e = np.argwhere(c<=thresh)
-    if len(e) == 0:
+    e = first_below(c,thresh,inclusive=True)
+    if e == -1:
         event_obs = 0
         event_time = len(c)
     else:
         event_obs = 1
-        event_time = e[0]
+        event_time = e
     
     timestep_scale = pop.timestep_scale
     event_time = event_time*timestep_scale
@@ -458,13 +502,13 @@ def resistance_time(pop,counts,genotype,thresh=0.01):
             else:
                 c = counts
                 
-            e = np.argwhere(c>thresh)
-            if len(e) == 0:
+            e = first_above(c,thresh)
+            if e == -1:
                 # event_obs = 0
                 times.append(len(c))
             else:
                 # event_obs = 1
-                times.append(e[0])
+                times.append(e)
         
         if np.min(times) == len(c):
             event_time = len(c)
@@ -479,13 +523,13 @@ def resistance_time(pop,counts,genotype,thresh=0.01):
         else:
             c = counts
             
-        e = np.argwhere(c>thresh)
-        if len(e) == 0:
+        e = first_above(c,thresh)
+        if e == -1:
             event_obs = 0
             event_time = len(c)
         else:
             event_obs = 1
-            event_time = e[0]
+            event_time = e
         
     timestep_scale = pop.timestep_scale
     event_time = event_time*timestep_scale
@@ -495,8 +539,11 @@ def resistance_time(pop,counts,genotype,thresh=0.01):
 def log_rank_test(self,durations_A, durations_B, 
                     event_observed_A=None, event_observed_B=None):
     
-    results = lifelines.statistics.logrank_test(durations_A, durations_B, 
-                                        event_observed_A=event_observed_A,
-                                        event_observed_B=event_observed_B)
+    # lifelines is slow to import and only needed here
+    from lifelines.statistics import logrank_test
+
+    results = logrank_test(durations_A, durations_B, 
+                           event_observed_A=event_observed_A,
+                           event_observed_B=event_observed_B)
     
     return results
\ No newline at end of file
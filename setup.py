@@ -18,12 +18,14 @@ setup(
       "matplotlib",
       "numpy",
       "importlib_resources", 
-      "lifelines", 
       "seaborn", 
-      "networkx",
-      "cycler",
-      "matplotlib-label-lines"
+      "cycler"
     ],
+    # only needed for landscape network plots, line labels and log-rank tests
+    extras_require={
+      "plot": ["networkx", "matplotlib-label-lines"],
+      "survival": ["lifelines"]
+    },
     include_package_data=True,
     package_data={'': ['data/*.csv', 'data/plates/*.csv','data/*.xlsx']}
 )
\ No newline at end of file